@@ -492,8 +492,10 @@ function openProgressStream(jobId) {
 
   let buffer = '';
   req.on('response', (res) => {
+    // SSE frames are raw UTF-8; decode across chunk boundaries.
+    res.setEncoding('utf8');
     res.on('data', (chunk) => {
-      buffer += chunk.toString();
+      buffer += chunk;
       let index;
       while ((index = buffer.indexOf('\n')) >= 0) {
         const line = buffer.slice(0, index).trim();
@@ -578,6 +580,11 @@ ipcMain.handle('start-translate', async (_event, params) => {
   const jobId = response.jobId;
   if (jobId) {
     openProgressStream(jobId);
+  } else {
+    sendToRenderer('pdf2zh:error', {
+      jobId: null,
+      message: response.error || '引擎执行失败'
+    });
   }
   return { jobId };
 });
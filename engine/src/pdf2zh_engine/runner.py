@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import codecs
 import dataclasses
 import enum
 import os
@@ -7,6 +10,7 @@ from datetime import date, datetime, time
 from pathlib import Path
 from typing import Any, Callable
 
+import orjson
 from pdf2zh_next.config.model import SettingsModel
 from pdf2zh_next.config.translate_engine_model import BingSettings, GoogleSettings
 from pdf2zh_next.high_level import do_translate_async_stream
@@ -44,83 +48,230 @@ def configure_babeldoc_asset_upstream() -> None:
     babel_assets._FASTEST_FONT_METADATA = None
 
 
-def _to_jsonable(obj: Any, _seen: set[int] | None = None) -> Any:
-    # Convert arbitrary objects from upstream events into JSON-serializable
-    # data without changing the event schema.
-    if obj is None or isinstance(obj, (str, int, float, bool)):
-        return obj
+# The upstream preference comes from the process environment, so applying it
+# once at import covers every job.
+configure_babeldoc_asset_upstream()
 
-    if isinstance(obj, Path):
+
+_JsonableHandler = Callable[[Any, set[int] | None], Any]
+
+# Binary payloads at least this long are base64-encoded without attempting
+# a UTF-8 decode first.
+_BYTES_BASE64_MIN = 64
+_utf8_decode = codecs.getdecoder("utf-8")
+_PRIMITIVE_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def _identity(obj: Any, _seen: set[int] | None) -> Any:
+    return obj
+
+
+def _path_to_jsonable(obj: Path, _seen: set[int] | None) -> str:
+    return str(obj)
+
+
+def _isoformat(obj: datetime | date | time, _seen: set[int] | None) -> str:
+    try:
+        return obj.isoformat()
+    except Exception:
         return str(obj)
 
-    if isinstance(obj, (datetime, date, time)):
+
+def _enum_to_jsonable(obj: enum.Enum, _seen: set[int] | None) -> Any:
+    return _to_jsonable(obj.value, _seen)
+
+
+def _bytes_to_jsonable(obj: bytes | bytearray, _seen: set[int] | None) -> str:
+    if len(obj) >= _BYTES_BASE64_MIN:
+        return base64.b64encode(obj).decode("ascii")
+    try:
+        return _utf8_decode(obj)[0]
+    except UnicodeDecodeError:
+        return obj.hex()
+
+
+def _memoryview_to_jsonable(obj: memoryview, _seen: set[int] | None) -> str:
+    return _bytes_to_jsonable(obj.tobytes(), _seen)
+
+
+def _dict_to_jsonable(obj: dict[Any, Any], _seen: set[int] | None) -> dict[str, Any]:
+    # Flat dicts of primitives are already JSON-ready; skip the copy.
+    if all(
+        type(k) is str and type(v) in _PRIMITIVE_TYPES for k, v in obj.items()
+    ):
+        return obj
+    return {
+        (k if isinstance(k, str) else str(_to_jsonable(k, _seen))): _to_jsonable(
+            v, _seen
+        )
+        for k, v in obj.items()
+    }
+
+
+def _list_to_jsonable(obj: Any, _seen: set[int] | None) -> list[Any]:
+    return [_to_jsonable(v, _seen) for v in obj]
+
+
+def _object_to_jsonable(obj: Any, _seen: set[int] | None) -> Any:
+    # Generic object; avoid recursion loops.
+    if hasattr(obj, "__dict__"):
+        if _seen is None:
+            _seen = set()
+        oid = id(obj)
+        if oid in _seen:
+            return str(obj)
+        _seen.add(oid)
         try:
-            return obj.isoformat()
+            return _to_jsonable(vars(obj), _seen)
         except Exception:
             return str(obj)
 
-    if isinstance(obj, enum.Enum):
-        return _to_jsonable(obj.value, _seen)
+    return str(obj)
 
-    if isinstance(obj, (bytes, bytearray, memoryview)):
-        b = bytes(obj)
+
+def _model_dump_to_jsonable(obj: Any, _seen: set[int] | None) -> Any:
+    # Pydantic v2
+    try:
+        return _to_jsonable(obj.model_dump(mode="python"), _seen)
+    except Exception:
         try:
-            return b.decode("utf-8")
+            return _to_jsonable(obj.model_dump(), _seen)
         except Exception:
-            return b.hex()
+            return _object_to_jsonable(obj, _seen)
+
 
-    if isinstance(obj, dict):
-        return {
-            (k if isinstance(k, str) else str(_to_jsonable(k, _seen))): _to_jsonable(
-                v, _seen
-            )
-            for k, v in obj.items()
-        }
+def _model_dict_to_jsonable(obj: Any, _seen: set[int] | None) -> Any:
+    # Pydantic v1
+    try:
+        return _to_jsonable(obj.dict(), _seen)
+    except Exception:
+        return _object_to_jsonable(obj, _seen)
+
+
+def _dataclass_to_jsonable(obj: Any, _seen: set[int] | None) -> Any:
+    try:
+        return _to_jsonable(dataclasses.asdict(obj), _seen)
+    except Exception:
+        return _object_to_jsonable(obj, _seen)
+
+
+# Exact-type dispatch; other types are resolved once by
+# _resolve_jsonable_handler and memoized here.
+_DISPATCH: dict[type, _JsonableHandler] = {
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    Path: _path_to_jsonable,
+    datetime: _isoformat,
+    date: _isoformat,
+    time: _isoformat,
+    bytes: _bytes_to_jsonable,
+    bytearray: _bytes_to_jsonable,
+    memoryview: _memoryview_to_jsonable,
+    dict: _dict_to_jsonable,
+    list: _list_to_jsonable,
+    tuple: _list_to_jsonable,
+    set: _list_to_jsonable,
+    frozenset: _list_to_jsonable,
+}
+
+
+def _resolve_jsonable_handler(tp: type) -> _JsonableHandler:
+    if issubclass(tp, (str, int, float, bool)):
+        return _identity
+    if issubclass(tp, Path):
+        return _path_to_jsonable
+    if issubclass(tp, (datetime, date, time)):
+        return _isoformat
+    if issubclass(tp, enum.Enum):
+        return _enum_to_jsonable
+    if issubclass(tp, (bytes, bytearray)):
+        return _bytes_to_jsonable
+    if issubclass(tp, dict):
+        return _dict_to_jsonable
+    if issubclass(tp, (list, tuple, set, frozenset)):
+        return _list_to_jsonable
+    if callable(getattr(tp, "model_dump", None)):
+        return _model_dump_to_jsonable
+    if callable(getattr(tp, "dict", None)):
+        return _model_dict_to_jsonable
+    if dataclasses.is_dataclass(tp):
+        return _dataclass_to_jsonable
+    return _object_to_jsonable
+
+
+def _to_jsonable(obj: Any, _seen: set[int] | None = None) -> Any:
+    # Convert arbitrary objects from upstream events into JSON-serializable
+    # data without changing the event schema.
+    tp = type(obj)
+    fn = _DISPATCH.get(tp)
+    if fn is None:
+        fn = _DISPATCH.setdefault(tp, _resolve_jsonable_handler(tp))
+    return fn(obj, _seen)
 
-    if isinstance(obj, (list, tuple, set, frozenset)):
-        return [_to_jsonable(v, _seen) for v in obj]
+
+def _fallback(obj: Any) -> Any:
+    # orjson default hook: only called for values it cannot encode natively,
+    # so the common str/int/float/dict/list leaves never reach Python.
+    if isinstance(obj, enum.Enum):
+        return obj.value
+
+    if isinstance(obj, Path):
+        return str(obj)
+
+    # Same bytes policy as _to_jsonable, whichever path serializes the event.
+    if isinstance(obj, (bytes, bytearray)):
+        return _bytes_to_jsonable(obj, None)
+
+    if isinstance(obj, memoryview):
+        return _memoryview_to_jsonable(obj, None)
+
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+
+    # Subclasses orjson rejects (e.g. numpy.float64) stay numbers.
+    if isinstance(obj, int):
+        return int(obj)
+
+    if isinstance(obj, float):
+        return float(obj)
 
     # Pydantic v2
     model_dump = getattr(obj, "model_dump", None)
     if callable(model_dump):
-        try:
-            return _to_jsonable(model_dump(mode="python"), _seen)
-        except Exception:
-            try:
-                return _to_jsonable(model_dump(), _seen)
-            except Exception:
-                pass
+        return model_dump(mode="python")
 
     # Pydantic v1
     model_dict = getattr(obj, "dict", None)
     if callable(model_dict):
-        try:
-            return _to_jsonable(model_dict(), _seen)
-        except Exception:
-            pass
+        return model_dict()
 
     if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
-        try:
-            return _to_jsonable(dataclasses.asdict(obj), _seen)
-        except Exception:
-            pass
+        return dataclasses.asdict(obj)
 
-    # Generic object; avoid recursion loops.
     if hasattr(obj, "__dict__"):
-        if _seen is None:
-            _seen = set()
-        oid = id(obj)
-        if oid in _seen:
-            return str(obj)
-        _seen.add(oid)
-        try:
-            return _to_jsonable(vars(obj), _seen)
-        except Exception:
-            return str(obj)
+        return vars(obj)
 
     return str(obj)
 
 
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+def _event_to_jsonable(event: Any) -> Any:
+    try:
+        return orjson.loads(
+            orjson.dumps(event, default=_fallback, option=_ORJSON_OPTIONS)
+        )
+    except TypeError:
+        # orjson gives up on circular or overly deep objects and on integers
+        # beyond 64 bits; the recursive walker degrades cycles to strings and
+        # keeps big integers exact.
+        return _to_jsonable(event)
+
+
 def build_settings(job: EngineJob) -> SettingsModel:
     if job.service == "google":
         engine_settings = GoogleSettings()
@@ -154,21 +305,21 @@ def build_settings(job: EngineJob) -> SettingsModel:
 async def run_job_stream(
     job: EngineJob, emit: Callable[[dict[str, Any]], None]
 ) -> None:
-    configure_babeldoc_asset_upstream()
     settings = build_settings(job)
-
-    # do_translate_async_stream translates one file at a time.
-    for input_path in job.inputs:
-        async for event in do_translate_async_stream(settings, input_path):
-            event_type = None
-            try:
-                event_type = event.get("type")
-            except Exception:
-                pass
-
-            # Ensure all event payloads are JSON-serializable (e.g. finish may
-            # include TranslateResult objects).
-            emit(_to_jsonable(event))
-
-            if event_type == "finish":
-                break
+    semaphore = asyncio.Semaphore(job.threads)
+
+    # do_translate_async_stream translates one file at a time (in its own
+    # subprocess), so run one stream per input. emit is synchronous and all
+    # streams share this event loop, so events are delivered whole and in
+    # per-file order without extra locking.
+    async def stream_one(input_path: str) -> None:
+        async with semaphore:
+            async for event in do_translate_async_stream(settings, input_path):
+                # Progress events are plain dicts and emit only reads a few
+                # keys, so pass them through; finish carries TranslateResult
+                # objects and is converted to plain data for the server.
+                if event.get("type") == "finish":
+                    event = _event_to_jsonable(event)
+                emit(event)
+
+    await asyncio.gather(*(stream_one(input_path) for input_path in job.inputs))
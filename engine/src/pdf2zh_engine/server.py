@@ -1,29 +1,47 @@
 from __future__ import annotations
 
 import argparse
-import base64
+import asyncio
 import json
 import logging
+import math
 import multiprocessing
 import os
+import queue
 import shutil
 import signal
 import sys
 import tempfile
 import threading
+import time
 import traceback
 import uuid
+from functools import cached_property
 from logging import FileHandler
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any
+from urllib.parse import SplitResult, parse_qs, urlsplit
+
+import orjson
+import pybase64
 
 from pdf2zh_engine.job import EngineJob
 
 
 LOGGER = logging.getLogger("pdf2zh_engine.server")
 MAX_LOG_BYTES = 1024 * 1024
+EVENT_QUEUE_MAXSIZE = 1024
+SSE_BATCH_MAX_EVENTS = 32
+SSE_BATCH_WINDOW = 0.005
+SSE_IDLE_TIMEOUT = 5.0
+# Each job translates in its own pdf2zh_next subprocess, so workers mostly
+# wait; half the cores (capped) bounds concurrent model memory.
+JOB_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+JOB_QUEUE_MAXSIZE = 16
+# Finished PDFs live in a per-process subdirectory named by pid.
+RESULTS_ROOT = Path(tempfile.gettempdir()) / "pdf2zh-engine-results"
 
 
 class SizeLimitedFileHandler(FileHandler):
@@ -134,19 +152,41 @@ def restore_offline_assets(offline_assets_zip: str | None) -> None:
         )
 
 
+def sweep_stale_results() -> None:
+    # A forced kill (Electron uses taskkill /F on Windows) skips the cleanup
+    # in main, so remove result dirs left behind by processes that are gone.
+    if not RESULTS_ROOT.is_dir():
+        return
+    for entry in RESULTS_ROOT.iterdir():
+        try:
+            pid = int(entry.name)
+        except ValueError:
+            continue
+        if pid != os.getpid() and not pid_exists(pid):
+            shutil.rmtree(entry, ignore_errors=True)
+
+
 class JobState:
     def __init__(self) -> None:
-        self.events: list[dict[str, Any]] = []
+        # Pre-framed SSE messages paired with an end-of-stream flag.
+        self.events: queue.Queue[tuple[bytes, bool]] = queue.Queue(
+            maxsize=EVENT_QUEUE_MAXSIZE
+        )
         self.done = False
         self.result: dict[str, Any] | None = None
+        self.result_path: Path | None = None
         self.error: dict[str, Any] | None = None
-        self.cv = threading.Condition()
 
 
 class EngineService:
     def __init__(self) -> None:
         self.jobs: dict[str, JobState] = {}
         self.lock = threading.Lock()
+        self.pending: queue.Queue[tuple[JobState, dict[str, Any]]] = queue.Queue(
+            maxsize=JOB_QUEUE_MAXSIZE
+        )
+        self.workers: list[threading.Thread] = []
+        self.worker_count = JOB_WORKERS
 
     def create_job(self) -> tuple[str, JobState]:
         job_id = str(uuid.uuid4())
@@ -155,45 +195,160 @@ class EngineService:
             self.jobs[job_id] = state
         return job_id, state
 
+    def submit_job(self, payload: dict[str, Any]) -> str | None:
+        # Returns None when the pending queue is full.
+        self._start_workers()
+        job_id, state = self.create_job()
+        try:
+            self.pending.put_nowait((state, payload))
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job_id]
+            return None
+        return job_id
+
+    def _start_workers(self) -> None:
+        # Started on first use rather than at import, since multiprocessing
+        # children of the frozen build re-import this module.
+        with self.lock:
+            if self.workers:
+                return
+            for i in range(self.worker_count):
+                thread = threading.Thread(
+                    target=self._work, name=f"pdf2zh-job-{i}", daemon=True
+                )
+                thread.start()
+                self.workers.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            state, payload = self.pending.get()
+            # Workers are long-lived; one broken job must not take a worker
+            # down with it.
+            try:
+                _run_job(state, payload)
+            except Exception as exc:
+                LOGGER.exception("job worker error")
+                if state.error is None and state.result is None:
+                    state.error = {
+                        "ok": False,
+                        "error": str(exc),
+                        "detail": traceback.format_exc(),
+                    }
+                state.done = True
+
     def get_job(self, job_id: str) -> JobState | None:
         with self.lock:
             return self.jobs.get(job_id)
 
+    def results_dir(self) -> Path:
+        path = RESULTS_ROOT / str(os.getpid())
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def remove_result_files(self) -> None:
+        shutil.rmtree(RESULTS_ROOT / str(os.getpid()), ignore_errors=True)
+
 
 SERVICE = EngineService()
 
+# Queued after the final event so the SSE streamer stops without polling.
+_END_OF_STREAM = (b"", True)
+
+
+def _put_frame(state: JobState, item: tuple[bytes, bool]) -> None:
+    # Called from the job's event loop, so never block: when the reader is
+    # too slow or gone, drop the oldest frame instead of stalling the
+    # translation.
+    try:
+        state.events.put_nowait(item)
+    except queue.Full:
+        try:
+            state.events.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            state.events.put_nowait(item)
+        except queue.Full:
+            pass
+
+
+def _dumps_json(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        # orjson rejects strings it cannot encode as UTF-8 (e.g. lone
+        # surrogates in exception text); the stdlib escapes them.
+        return json.dumps(obj, ensure_ascii=True).encode("utf-8")
+
 
 def _emit(state: JobState, payload: dict[str, Any]) -> None:
-    with state.cv:
-        state.events.append(payload)
-        state.cv.notify_all()
+    # Serialize on the job thread so the SSE writer only copies bytes.
+    frame = b"data: " + _dumps_json(payload) + b"\n\n"
+    _put_frame(state, (frame, payload.get("type") in ("done", "error")))
+
+
+def _collect_sse_batch(
+    state: JobState, first: tuple[bytes, bool]
+) -> tuple[bytearray, bool]:
+    # Coalesce events that arrive within SSE_BATCH_WINDOW of the first one
+    # into a single write. Returns the framed bytes and whether the stream
+    # has reached its end.
+    buf = bytearray()
+    deadline = time.monotonic() + SSE_BATCH_WINDOW
+    frame, final = first
+    count = 0
+    while True:
+        buf += frame
+        if final:
+            return buf, True
+        count += 1
+        if count >= SSE_BATCH_MAX_EVENTS:
+            return buf, False
+        try:
+            frame, final = state.events.get(
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+        except queue.Empty:
+            return buf, False
+
+
+_PROGRESS_KEYS = ("overall_progress", "stage_progress", "progress")
+_PROGRESS_FRAME = (
+    b'data: {"type":"progress","pct":%d,"stage":%b,"message":%b}\n\n'
+)
 
 
-def _event_to_progress(event: dict[str, Any]) -> dict[str, Any] | None:
-    pct: float | None = None
-    for key in ("overall_progress", "stage_progress", "progress"):
+def _progress_value(event: dict[str, Any]) -> float | None:
+    for key in _PROGRESS_KEYS:
         if key in event:
             try:
                 value = float(event[key])
-            except Exception:
+            except (TypeError, ValueError):
                 continue
-            pct = value * 100 if value <= 1 else value
-            break
-
-    if pct is None and event.get("type") in ("start", "engine_start"):
+            if math.isfinite(value):
+                return value
+    return None
+
+
+def _event_to_progress_frame(event: dict[str, Any]) -> bytes | None:
+    # Builds the SSE progress frame directly; only stage and message need
+    # JSON string escaping.
+    value = _progress_value(event)
+    if value is not None:
+        pct = value * 100 if value <= 1 else value
+    elif event.get("type") in ("start", "engine_start"):
         pct = 0
-
-    if pct is None:
+    else:
         return None
 
     stage = str(event.get("stage") or event.get("type") or "progress")
     message = str(event.get("message") or "")
-    return {
-        "type": "progress",
-        "pct": max(0, min(100, round(pct))),
-        "stage": stage,
-        "message": message,
-    }
+    return _PROGRESS_FRAME % (
+        max(0, min(100, round(pct))),
+        _dumps_json(stage),
+        _dumps_json(message),
+    )
 
 
 def _resolve_source(payload: dict[str, Any]) -> tuple[str, str | None]:
@@ -236,12 +391,37 @@ def _build_job(payload: dict[str, Any], output_dir: str) -> tuple[EngineJob, str
 
 
 def _find_output_pdf(output_dir: str) -> Path:
-    candidates = list(Path(output_dir).rglob("*.pdf"))
+    # Newest PDF, preferring "dual" outputs. Each file is stat'ed once, and
+    # on Windows scandir already carries the mtime.
+    candidates: list[tuple[bool, float, str]] = []
+    pending = [output_dir]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                    continue
+                name = entry.name.lower()
+                if name.endswith(".pdf") and entry.is_file():
+                    candidates.append(
+                        ("dual" in name, entry.stat().st_mtime, entry.path)
+                    )
     if not candidates:
         raise FileNotFoundError("No PDF output found in temporary directory")
-    dual_candidates = [p for p in candidates if "dual" in p.name.lower()]
-    ordered = dual_candidates or candidates
-    return max(ordered, key=lambda p: p.stat().st_mtime)
+    _, _, pdf_path = max(candidates)
+    return Path(pdf_path)
+
+
+def _result_pdf_from_event(translate_result: Any) -> Path | None:
+    # The finish event carries the TranslateResult (converted to a dict by
+    # the runner) with the paths of the files it wrote.
+    if not isinstance(translate_result, dict):
+        return None
+    value = translate_result.get("dual_pdf_path")
+    if not value:
+        return None
+    path = Path(value)
+    return path if path.is_file() else None
 
 
 def _run_job(state: JobState, payload: dict[str, Any]) -> None:
@@ -249,33 +429,42 @@ def _run_job(state: JobState, payload: dict[str, Any]) -> None:
     try:
         temp_dir = tempfile.mkdtemp(prefix="pdf2zh-engine-")
         job, source_filename = _build_job(payload, temp_dir)
+        finish_event: dict[str, Any] = {}
 
         def emit(event: dict[str, Any]) -> None:
-            progress = _event_to_progress(event)
+            progress = _event_to_progress_frame(event)
             if progress:
-                _emit(state, progress)
+                _put_frame(state, (progress, False))
             if event.get("type") == "finish":
+                finish_event.update(event)
                 _emit(state, {"type": "done", "pct": 100})
 
         stdout = sys.stdout
         sys.stdout = sys.stderr
         try:
-            import asyncio
+            # Imported lazily: pdf2zh_next is slow to import and must not
+            # delay or write ahead of the ready line on stdout.
             from pdf2zh_engine.runner import run_job_stream
 
             asyncio.run(run_job_stream(job, emit))
         finally:
             sys.stdout = stdout
 
-        output_pdf = _find_output_pdf(temp_dir)
-        pdf_bytes = output_pdf.read_bytes()
-        pdf_base64 = base64.b64encode(pdf_bytes).decode("ascii")
+        # Keep only the output PDF past the temp dir cleanup; /result and
+        # /result/pdf read it from disk on demand.
+        output_pdf = _result_pdf_from_event(
+            finish_event.get("translate_result")
+        ) or _find_output_pdf(temp_dir)
+        fd, result_path = tempfile.mkstemp(
+            prefix="result-", suffix=".pdf", dir=SERVICE.results_dir()
+        )
+        os.close(fd)
+        # Both paths are under the temp dir, so this is a rename; unlike
+        # shutil.move it overwrites the mkstemp placeholder on Windows too.
+        os.replace(output_pdf, result_path)
+        state.result_path = Path(result_path)
         stem = Path(source_filename).stem if source_filename else "output"
-        state.result = {
-            "ok": True,
-            "filename": f"{stem} (双语).pdf",
-            "pdf_base64": pdf_base64,
-        }
+        state.result = {"ok": True, "filename": f"{stem} (双语).pdf"}
         _emit(state, {"type": "done", "pct": 100})
         state.done = True
     except Exception as exc:
@@ -288,13 +477,22 @@ def _run_job(state: JobState, payload: dict[str, Any]) -> None:
     finally:
         if temp_dir:
             shutil.rmtree(temp_dir, ignore_errors=True)
-        with state.cv:
-            state.cv.notify_all()
+        _put_frame(state, _END_OF_STREAM)
 
 
 class Handler(BaseHTTPRequestHandler):
+    # Handlers serve a single request (HTTP/1.0), so caching per instance is
+    # caching per request.
+    @cached_property
+    def _parsed(self) -> SplitResult:
+        return urlsplit(self.path)
+
+    @cached_property
+    def _query(self) -> dict[str, list[str]]:
+        return parse_qs(self._parsed.query)
+
     def _json_response(self, status: int, payload: dict[str, Any]) -> None:
-        body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        body = _dumps_json(payload)
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(body)))
@@ -309,7 +507,7 @@ class Handler(BaseHTTPRequestHandler):
         return json.loads(raw)
 
     def do_POST(self) -> None:
-        if self.path != "/translate":
+        if self._parsed.path != "/translate":
             self.send_error(HTTPStatus.NOT_FOUND)
             return
         try:
@@ -332,20 +530,25 @@ class Handler(BaseHTTPRequestHandler):
             )
             return
 
-        job_id, state = SERVICE.create_job()
-        thread = threading.Thread(target=_run_job, args=(state, payload), daemon=True)
-        thread.start()
+        job_id = SERVICE.submit_job(payload)
+        if job_id is None:
+            self._json_response(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"ok": False, "error": "too many pending jobs"},
+            )
+            return
         self._json_response(HTTPStatus.OK, {"jobId": job_id})
 
     def do_GET(self) -> None:
-        if self.path == "/health":
+        path = self._parsed.path
+        if path == "/health":
             self._json_response(
                 HTTPStatus.OK,
                 {"status": "ok", "pid": os.getpid()},
             )
             return
 
-        if self.path.startswith("/events"):
+        if path == "/events":
             job_id = self._query_param("jobId")
             if not job_id:
                 self.send_error(HTTPStatus.BAD_REQUEST)
@@ -361,7 +564,7 @@ class Handler(BaseHTTPRequestHandler):
             self._stream_events(state)
             return
 
-        if self.path.startswith("/result"):
+        if path in ("/result", "/result/pdf"):
             job_id = self._query_param("jobId")
             if not job_id:
                 self.send_error(HTTPStatus.BAD_REQUEST)
@@ -372,8 +575,21 @@ class Handler(BaseHTTPRequestHandler):
                     HTTPStatus.NOT_FOUND, {"ok": False, "error": "job not found"}
                 )
                 return
-            if state.result:
-                self._json_response(HTTPStatus.OK, state.result)
+            if state.result and state.result_path:
+                try:
+                    if path == "/result/pdf":
+                        self._send_pdf(state.result_path)
+                    else:
+                        pdf_bytes = state.result_path.read_bytes()
+                        pdf_base64 = pybase64.b64encode(pdf_bytes).decode("ascii")
+                        self._json_response(
+                            HTTPStatus.OK, {**state.result, "pdf_base64": pdf_base64}
+                        )
+                except FileNotFoundError:
+                    self._json_response(
+                        HTTPStatus.NOT_FOUND,
+                        {"ok": False, "error": "result file missing"},
+                    )
                 return
             if state.error:
                 self._json_response(HTTPStatus.OK, state.error)
@@ -385,35 +601,36 @@ class Handler(BaseHTTPRequestHandler):
 
         self.send_error(HTTPStatus.NOT_FOUND)
 
+    def _send_pdf(self, pdf_path: Path) -> None:
+        with pdf_path.open("rb") as source:
+            size = os.fstat(source.fileno()).st_size
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            shutil.copyfileobj(source, self.wfile)
+
     def _query_param(self, key: str) -> str | None:
-        if "?" not in self.path:
-            return None
-        query = self.path.split("?", 1)[1]
-        for part in query.split("&"):
-            if not part:
-                continue
-            k, _, v = part.partition("=")
-            if k == key:
-                return v
-        return None
+        return self._query.get(key, [None])[0]
 
     def _stream_events(self, state: JobState) -> None:
         try:
             while True:
-                event: dict[str, Any] | None = None
-                with state.cv:
-                    if state.events:
-                        event = state.events.pop(0)
-                    elif state.done:
+                # Wakes on the next queued event; the timeout only covers a
+                # sentinel consumed by an earlier reader of the same job.
+                try:
+                    item = state.events.get(
+                        block=not state.done, timeout=SSE_IDLE_TIMEOUT
+                    )
+                except queue.Empty:
+                    if state.done:
                         break
-                    else:
-                        state.cv.wait(timeout=1)
-                if event is None:
                     continue
-                data = json.dumps(event, ensure_ascii=True)
-                self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
-                self.wfile.flush()
-                if event.get("type") in ("done", "error"):
+                batch, finished = _collect_sse_batch(state, item)
+                if batch:
+                    self.wfile.write(batch)
+                    self.wfile.flush()
+                if finished:
                     break
         except BrokenPipeError:
             return
@@ -430,11 +647,14 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--ppid", type=int, default=0)
     parser.add_argument("--log-dir", type=str, default=None)
     parser.add_argument("--offline-assets-zip", type=str, default=None)
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
     args = parser.parse_args(argv)
 
     log_dir = args.log_dir or os.getenv("PDF2ZH_LOG_DIR")
     setup_logging(log_dir)
     restore_offline_assets(args.offline_assets_zip)
+    sweep_stale_results()
+    SERVICE.worker_count = max(1, args.workers)
 
     httpd = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
     port = httpd.server_address[1]
@@ -462,6 +682,7 @@ def main(argv: list[str] | None = None) -> int:
     finally:
         stop_event.set()
         httpd.server_close()
+        SERVICE.remove_result_files()
         LOGGER.info("engine server stopped")
     return 0
 